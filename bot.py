@@ -5,9 +5,9 @@ from datetime import datetime, time as dt_time
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, ContextTypes, filters
-import google.generativeai as genai
 
 from features.notion_utils import get_tasks_raw, set_task_status_by_name, delete_task_by_name, update_due_date_by_name
+from features.notion_parse import parse_tasks
 from features.view import format_tasks_list
 from features.add import add_task_from_text
 from features.pomodoro import start_pomodoro, start_break, pomodoro_status, stop_pomodoro
@@ -18,18 +18,47 @@ from features.music import get_music_menu, get_song_by_choice, get_random_song
 from features.schedule_parser import tasks_from_image_bytes
 from features.translate import (set_language, get_language, translate_text, get_language_menu, 
                                  SUPPORTED_LANGUAGES, enable_tts, disable_tts, is_tts_enabled, text_to_speech)
+from features._genai import get_llm
 from app.config import validate_env
 
 # --- Load environment variables ---
 load_dotenv()
 
 BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-# --- Configure Gemini ---
-genai.configure(api_key=GOOGLE_API_KEY)
-MODEL = "gemini-2.5-flash"
-llm = genai.GenerativeModel(MODEL)
+# --- Usage / help messages ---
+ADD_USAGE = (
+    "📝 To add a task, use this format:\n"
+    "**/add TaskName [priority] due:DATE project:ProjectName**\n\n"
+    "**Examples:**\n"
+    "• /add Study for exam\n"
+    "• /add Finish homework [high] due:tomorrow\n"
+    "• /add Review notes [medium] due:2025-12-15 project:Math\n"
+    "\n**Priority must be in brackets:** [high], [medium], or [low]\n"
+    "• /add Write report [medium] due:2025-11-25 project:ADSC 3710\n\n"
+    "**Options:**\n"
+    "• Priority: [high], [medium], [low] (default: medium)\n"
+    "• Due date: due:today, due:tomorrow, due:nextweek, or due:YYYY-MM-DD\n"
+    "• Project: project:ProjectName\n\n"
+    "You can also say: \"add Finish essay [high] due:tomorrow project:English\""
+)
+
+ADD_TASK_HELP = (
+    "To add a task, use this format:\n\n"
+    "/add TaskName [priority] due:DATE project:ProjectName\n\n"
+    "Examples:\n"
+    "• /add Study for exam [high] due:tomorrow\n"
+    "• /add Essay [medium] project:English due:next week\n"
+    "• /add Coffee Chat [low] due:11/21/2025 project:Career\n\n"
+    "**Priority must be in brackets:** [high], [medium], or [low]\n\n"
+    "Or tell me naturally:\n"
+    "\"Add Math homework [high] due Nov 25\""
+)
+
+DONE_USAGE = "Usage: /done <task name>"
+STATUS_USAGE = "Usage: /status <task name>, <Not started|In Progress|Completed>"
+DELETE_USAGE = "Usage: /delete <task name>"
+HABIT_STREAK_USAGE = "Usage: /habit_streak <name>"
 
 # --- TTS Helper Function ---
 async def send_with_tts(update: Update, text: str, **kwargs):
@@ -118,22 +147,7 @@ async def add_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
     task_text = " ".join(context.args).strip()
     
     if not task_text:
-        await update.message.reply_text(
-            "📝 To add a task, use this format:\n"
-            "**/add TaskName [priority] due:DATE project:ProjectName**\n\n"
-            "**Examples:**\n"
-            "• /add Study for exam\n"
-            "• /add Finish homework [high] due:tomorrow\n"
-            "• /add Review notes [medium] due:2025-12-15 project:Math\n"
-            "\n**Priority must be in brackets:** [high], [medium], or [low]\n"
-            "• /add Write report [medium] due:2025-11-25 project:ADSC 3710\n\n"
-            "**Options:**\n"
-            "• Priority: [high], [medium], [low] (default: medium)\n"
-            "• Due date: due:today, due:tomorrow, due:nextweek, or due:YYYY-MM-DD\n"
-            "• Project: project:ProjectName\n\n"
-            "You can also say: \"add Finish essay [high] due:tomorrow project:English\"",
-            parse_mode="Markdown"
-        )
+        await update.message.reply_text(ADD_USAGE, parse_mode="Markdown")
         return
     
     await update.message.reply_text("Creating your task...")
@@ -148,10 +162,10 @@ async def add_task(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def send_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send email reminder immediately"""
     # Use SendGrid for email reminders
-    from features.reminder import check_and_send_reminders, get_upcoming_tasks
+    from features.reminder import check_and_send_reminders, aget_upcoming_tasks
     
     # Get tasks that will be included in email
-    upcoming = get_upcoming_tasks(hours_ahead=24)
+    upcoming = await aget_upcoming_tasks(hours_ahead=24)
     
     if upcoming:
         # Show preview in chat
@@ -159,7 +173,7 @@ async def send_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
         priority_emoji = {"High": "🔴", "Medium": "🟡", "Low": "🔵"}
         for task in upcoming[:5]:  # Show max 5
             emoji = priority_emoji.get(task['priority'], '🔵')
-            due_str = task['due_date'].strftime('%b %d')
+            due_str = datetime.fromtimestamp(task['due_ts']).strftime('%b %d')
             preview += f"{emoji} {task['name']} (due {due_str})\n"
         if len(upcoming) > 5:
             preview += f"\n...and {len(upcoming)-5} more\n"
@@ -170,7 +184,7 @@ async def send_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
 
-        result = check_and_send_reminders(hours_ahead=24)
+        result = await check_and_send_reminders(hours_ahead=24)
         if result["success"]:
             await update.message.reply_text(
                 f"✅ {result['message']}\n\n"
@@ -227,11 +241,7 @@ async def try_natural_action(update: Update, context: ContextTypes.DEFAULT_TYPE,
     try:
         # Provide current task titles to help the model resolve names
         task_rows = get_tasks_raw()
-        task_titles = []
-        for row in task_rows:
-            title_arr = (row.get("properties", {}).get("Task", {}).get("title") or [])
-            if title_arr:
-                task_titles.append(title_arr[0].get("plain_text", "").strip())
+        task_titles = [task.name.strip() for task in parse_tasks(task_rows)]
 
         task_titles_str = "\n".join(f"- {t}" for t in task_titles[:50])  # cap to 50 for brevity
 
@@ -282,7 +292,7 @@ User message:
 {user_text}
 """
 
-        resp = llm.generate_content(instruction)
+        resp = get_llm().generate_content(instruction)
         raw = resp.text.strip() if getattr(resp, "text", None) else ""
 
         # Extract JSON object from the response
@@ -477,6 +487,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if not text:
         return  # No text to process
+    
+    # Lowercased once; every keyword check below reads this copy
+    text_lower = text.lower()
 
     # Check if user is replying with a music choice (1-5)
     if text in ["1", "2", "3", "4", "5"]:
@@ -490,29 +503,17 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
     # Enhanced greeting detection - catch greetings early
-    greetings = ["hi", "hello", "hey", "yo", "sup", "start", "hi!", "hello!", "hey!", "hi there", "hello there"]
-    if text.lower() in greetings or text.lower().startswith(tuple(greetings)):
+    greetings = ("hi", "hello", "hey", "yo", "sup", "start", "hi!", "hello!", "hey!", "hi there", "hello there")
+    if text_lower in greetings or text_lower.startswith(greetings):
         await update.message.reply_text(
             "Hi, I'm Kairos — your productivity chatbot.\nHow can I help you today?"
         )
         return
 
     # Check if user is asking how to add a task (without task details)
-    text_lower = text.lower()
     vague_add_phrases = ["add a new task", "add task", "create a task", "create task", "new task"]
     if any(phrase in text_lower for phrase in vague_add_phrases) and len(text_lower.split()) <= 8:
-        await update.message.reply_text(
-            "To add a task, use this format:\n\n"
-            "/add TaskName [priority] due:DATE project:ProjectName\n\n"
-            "Examples:\n"
-            "• /add Study for exam [high] due:tomorrow\n"
-            "• /add Essay [medium] project:English due:next week\n"
-            "• /add Coffee Chat [low] due:11/21/2025 project:Career\n\n"
-            "**Priority must be in brackets:** [high], [medium], or [low]\n\n"
-            "Or tell me naturally:\n"
-            "\"Add Math homework [high] due Nov 25\"",
-            parse_mode="Markdown"
-        )
+        await update.message.reply_text(ADD_TASK_HELP, parse_mode="Markdown")
         return
 
     # First, try to interpret and execute a natural-language intent
@@ -521,8 +522,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Check if user is asking for tasks/workload directly (not action requests)
-    text_lower = text.lower()
-    
     # Exclude action keywords that should be handled by natural language processing
     action_keywords = ["add", "create", "delete", "remove", "mark", "complete", "update", "change", "parse", "import", "extract", "scan"]
     is_action_request = any(action in text_lower for action in action_keywords)
@@ -602,7 +601,7 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         task_summary = None
     
     # Get Q&A response
-    response = get_qa_response(text, task_summary)
+    response = await get_qa_response(text, task_summary)
     await update.message.reply_text(response)
 
 
@@ -614,7 +613,8 @@ if __name__ == "__main__":
     if missing_env:
         print("Warning: Missing environment variables:", ", ".join(missing_env))
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+    # Process updates concurrently so one user's slow Gemini call doesn't queue everyone else
+    app = ApplicationBuilder().token(BOT_TOKEN).concurrent_updates(True).build()
     
     # Basic commands
     app.add_handler(CommandHandler("start", start))
@@ -660,12 +660,12 @@ if __name__ == "__main__":
                             break
                 if example:
                     await update.message.reply_text(
-                        f"Usage: /done <task name>\nExample: /done {example}"
+                        f"{DONE_USAGE}\nExample: /done {example}"
                     )
                 else:
-                    await update.message.reply_text("Usage: /done <task name>")
+                    await update.message.reply_text(DONE_USAGE)
             except Exception:
-                await update.message.reply_text("Usage: /done <task name>")
+                await update.message.reply_text(DONE_USAGE)
             return
         res = set_task_status_by_name(name, "Completed")
         await update.message.reply_text(res.get("message", "Done."))
@@ -677,9 +677,7 @@ if __name__ == "__main__":
         """
         text_after_command = update.message.text.partition(" ")[2].strip()
         if not text_after_command:
-            await update.message.reply_text(
-                "Usage: /status <task name>, <Not started|In Progress|Completed>"
-            )
+            await update.message.reply_text(STATUS_USAGE)
             return
 
         name = None
@@ -694,16 +692,15 @@ if __name__ == "__main__":
         # Fallback: legacy format (status as the trailing phrase)
         if not name or not status_raw:
             full = " ".join(context.args).strip()
+            full_lower = full.lower()
             for opt in ["Not started", "In progress", "In Progress", "Completed"]:
-                if full.lower().endswith(opt.lower()):
+                if full_lower.endswith(opt.lower()):
                     status_raw = opt
                     name = full[: -len(opt)].strip()
                     break
 
         if not name or not status_raw:
-            await update.message.reply_text(
-                "Usage: /status <task name>, <Not started|In Progress|Completed>"
-            )
+            await update.message.reply_text(STATUS_USAGE)
             return
 
         # Normalize status to Notion's expected casing
@@ -728,7 +725,7 @@ if __name__ == "__main__":
         """Delete a task by name."""
         name = " ".join(context.args).strip()
         if not name:
-            await update.message.reply_text("Usage: /delete <task name>")
+            await update.message.reply_text(DELETE_USAGE)
             return
         res = delete_task_by_name(name)
         await update.message.reply_text(res.get("message", "Task deleted."))
@@ -756,7 +753,7 @@ if __name__ == "__main__":
     async def habit_streak_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         name = " ".join(context.args).strip()
         if not name:
-            await update.message.reply_text("Usage: /habit_streak <name>")
+            await update.message.reply_text(HABIT_STREAK_USAGE)
             return
         await update.message.reply_text(current_streak(name))
 
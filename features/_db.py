@@ -0,0 +1,32 @@
+"""
+Shared SQLite connection for the habit and analytics tables in kairos.db.
+"""
+
+import os
+import sqlite3
+import threading
+
+DB_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "kairos.db"))
+
+# Serializes every use of the connection; reentrant so get_conn() can be
+# called while a caller already holds it for a multi-statement block.
+LOCK = threading.RLock()
+_conn = None
+
+
+def get_conn() -> sqlite3.Connection:
+    """The process-wide connection, opened in autocommit + WAL mode on first use."""
+    global _conn
+    with LOCK:
+        if _conn is None:
+            conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _conn = conn
+        return _conn
+
+
+def execute(sql: str, params: tuple = ()) -> list:
+    """Run a statement on the shared connection and return all result rows."""
+    with LOCK:
+        return get_conn().execute(sql, params).fetchall()
@@ -0,0 +1,26 @@
+"""
+Shared Gemini model for every feature that calls the LLM.
+"""
+
+import os
+from functools import lru_cache
+
+MODEL = "gemini-2.5-flash"
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """Configure Gemini and build the model on first use; None if unavailable."""
+    try:
+        import google.generativeai as genai
+        from dotenv import load_dotenv
+    except ImportError:
+        return None
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        return None
+
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(MODEL)
@@ -4,10 +4,13 @@ Supports natural language parsing and structured task creation.
 """
 
 import os
+import re
 import requests
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
+from features.notion_utils import clear_tasks_cache
+
 load_dotenv()
 
 # --- Environment setup ---
@@ -21,6 +24,11 @@ HEADERS = {
 }
 
 # --- Parser: interpret freeform text ---
+_PRIORITY_RE = re.compile(r"\[(high|medium|low)\]", re.IGNORECASE)
+_PROJECT_RE = re.compile(r"project:", re.IGNORECASE)
+_DUE_RE = re.compile(r"due:\s*(\S*)", re.IGNORECASE)
+
+
 def parse_task_input(text: str) -> dict:
     """
     Parse user input to extract task details.
@@ -32,6 +40,7 @@ def parse_task_input(text: str) -> dict:
         "Finish homework [high] due:2025-11-12 project:Math"
 
     Returns dict with: name, priority, due_date, project
+    (the task name and project keep the casing the user typed)
     """
     task_data = {
         "name": "",
@@ -43,32 +52,24 @@ def parse_task_input(text: str) -> dict:
     original = text.strip()
 
     # --- Extract priority ---
-    priority_map = {"[high]": "High", "[medium]": "Medium", "[low]": "Low"}
-    for key, val in priority_map.items():
-        if key in original.lower():
-            task_data["priority"] = val
-            # Remove priority using case-insensitive replacement
-            import re
-            original = re.sub(re.escape(key), "", original, flags=re.IGNORECASE).strip()
-            break
+    match = _PRIORITY_RE.search(original)
+    if match:
+        task_data["priority"] = match.group(1).capitalize()
+        # Remove the priority tag(s) from the task name
+        original = _PRIORITY_RE.sub("", original).strip()
 
     # --- Extract project FIRST (to avoid conflict with due date) ---
-    if "project:" in original.lower():
-        parts = original.lower().split("project:")
-        before = parts[0]
-        after = original[len(before) + 8:]  # +8 for "project:"
-        original = before.strip()
-        task_data["project"] = after.strip()
+    parts = _PROJECT_RE.split(original, maxsplit=1)
+    if len(parts) == 2:
+        original = parts[0].strip()
+        task_data["project"] = parts[1].strip()
 
     # --- Extract due date ---
-    if "due:" in original.lower():
-        parts = original.lower().split("due:")
-        before = parts[0]
-        after = original[len(before) + 4:]  # +4 for "due:"
-        original = before.strip()
-        due_str = after.strip().split()[0]
-
-        due_str = due_str.lower()
+    match = _DUE_RE.search(original)
+    if match:
+        # Only the first token after "due:" is the date; the rest is dropped
+        due_str = match.group(1).lower()
+        original = original[:match.start()].strip()
         today = datetime.now()
 
         if due_str == "today":
@@ -139,6 +140,8 @@ def create_notion_task(task_name: str, priority: str = "Medium", due_date: str =
     try:
         res = requests.post("https://api.notion.com/v1/pages", headers=HEADERS, json=payload)
         if res.status_code == 200:
+            # New page must show up in the next cached task query
+            clear_tasks_cache()
             msg = f"Task created: *{task_name}*\nPriority: {priority}\nStatus: Not started"
             if due_date:
                 msg += f"\nDue: {due_date}"
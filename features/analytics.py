@@ -1,88 +1,70 @@
-import os
-import sqlite3
 from datetime import datetime
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "kairos.db")
-DB_PATH = os.path.abspath(DB_PATH)
-
-
-def _conn():
-    return sqlite3.connect(DB_PATH)
+from features import _db
 
 
 def init_db():
-    with _conn() as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS pomodoro_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                started_at TEXT NOT NULL,
-                ended_at TEXT,
-                kind TEXT NOT NULL, -- 'work' or 'break'
-                task TEXT
-            )
-        """)
-        conn.commit()
+    _db.execute("""
+        CREATE TABLE IF NOT EXISTS pomodoro_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            started_at TEXT NOT NULL,
+            ended_at TEXT,
+            kind TEXT NOT NULL, -- 'work' or 'break'
+            task TEXT
+        )
+    """)
 
 
 def log_session_start(user_id: int, kind: str, task: str | None):
-    with _conn() as conn:
-        conn.execute(
-            "INSERT INTO pomodoro_sessions(user_id, started_at, kind, task) VALUES (?, ?, ?, ?)",
-            (user_id, datetime.utcnow().isoformat(), kind, task)
-        )
-        conn.commit()
+    _db.execute(
+        "INSERT INTO pomodoro_sessions(user_id, started_at, kind, task) VALUES (?, ?, ?, ?)",
+        (user_id, datetime.utcnow().isoformat(), kind, task)
+    )
 
 
 def log_session_end(user_id: int, kind: str):
-    with _conn() as conn:
-        # update the latest open session of this kind for user
-        cur = conn.execute(
-            "SELECT id FROM pomodoro_sessions WHERE user_id = ? AND kind = ? AND ended_at IS NULL ORDER BY id DESC LIMIT 1",
-            (user_id, kind)
+    # update the latest open session of this kind for user
+    _db.execute(
+        """
+        UPDATE pomodoro_sessions SET ended_at = ?
+        WHERE id = (
+            SELECT id FROM pomodoro_sessions
+            WHERE user_id = ? AND kind = ? AND ended_at IS NULL
+            ORDER BY id DESC LIMIT 1
         )
-        row = cur.fetchone()
-        if row:
-            conn.execute(
-                "UPDATE pomodoro_sessions SET ended_at = ? WHERE id = ?",
-                (datetime.utcnow().isoformat(), row[0])
-            )
-            conn.commit()
+        """,
+        (datetime.utcnow().isoformat(), user_id, kind)
+    )
 
 
 def summary_last_7_days() -> str:
     from datetime import timedelta
     from features.notion_utils import get_tasks_raw
     
-    with _conn() as conn:
-        # Pomodoro sessions
-        cur = conn.execute("SELECT COUNT(*) FROM pomodoro_sessions WHERE kind='work' AND started_at >= datetime('now', '-7 days')")
-        work_count = cur.fetchone()[0]
-        
-        # Habit logs
-        cur = conn.execute("SELECT COUNT(*) FROM habit_logs WHERE logged_at >= datetime('now', '-7 days')")
-        habit_count = cur.fetchone()[0]
-        
-        # Daily breakdown for pomodoros
-        cur = conn.execute("""
-            SELECT date(started_at) as day, COUNT(*) as count 
-            FROM pomodoro_sessions 
-            WHERE kind='work' AND started_at >= datetime('now', '-7 days')
-            GROUP BY date(started_at)
-            ORDER BY day DESC
-        """)
-        daily_pomodoro = cur.fetchall()
-        
-        # Daily breakdown for habits
-        cur = conn.execute("""
-            SELECT date(logged_at) as day, COUNT(*) as count 
-            FROM habit_logs 
-            WHERE logged_at >= datetime('now', '-7 days')
-            GROUP BY date(logged_at)
-            ORDER BY day DESC
-        """)
-        daily_habits = cur.fetchall()
+    # Pomodoro sessions
+    work_count = _db.execute("SELECT COUNT(*) FROM pomodoro_sessions WHERE kind='work' AND started_at >= datetime('now', '-7 days')")[0][0]
+    
+    # Habit logs
+    habit_count = _db.execute("SELECT COUNT(*) FROM habit_logs WHERE logged_at >= datetime('now', '-7 days')")[0][0]
+    
+    # Daily breakdown for pomodoros
+    daily_pomodoro = _db.execute("""
+        SELECT date(started_at) as day, COUNT(*) as count 
+        FROM pomodoro_sessions 
+        WHERE kind='work' AND started_at >= datetime('now', '-7 days')
+        GROUP BY date(started_at)
+        ORDER BY day DESC
+    """)
+    
+    # Daily breakdown for habits
+    daily_habits = _db.execute("""
+        SELECT date(logged_at) as day, COUNT(*) as count 
+        FROM habit_logs 
+        WHERE logged_at >= datetime('now', '-7 days')
+        GROUP BY date(logged_at)
+        ORDER BY day DESC
+    """)
     
     # Get completed tasks from Notion
     try:
@@ -164,9 +146,8 @@ def summary_last_7_days() -> str:
 
 def work_sessions_today(user_id: int) -> int:
     """Count work sessions started today (UTC)."""
-    with _conn() as conn:
-        cur = conn.execute(
-            "SELECT COUNT(*) FROM pomodoro_sessions WHERE user_id = ? AND kind='work' AND date(started_at) = date('now')",
-            (user_id,)
-        )
-        return int(cur.fetchone()[0] or 0)
+    rows = _db.execute(
+        "SELECT COUNT(*) FROM pomodoro_sessions WHERE user_id = ? AND kind='work' AND date(started_at) = date('now')",
+        (user_id,)
+    )
+    return int(rows[0][0] or 0)
@@ -1,33 +1,24 @@
-import os
-import sqlite3
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "kairos.db")
-DB_PATH = os.path.abspath(DB_PATH)
-
-
-def _conn():
-    return sqlite3.connect(DB_PATH)
+from features import _db
 
 
 def init_db():
-    with _conn() as conn:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS habits (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
-            )
-        """)
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS habit_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                habit_id INTEGER NOT NULL,
-                logged_at TEXT NOT NULL,
-                FOREIGN KEY(habit_id) REFERENCES habits(id)
-            )
-        """)
-        conn.commit()
+    _db.execute("""
+        CREATE TABLE IF NOT EXISTS habits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL
+        )
+    """)
+    _db.execute("""
+        CREATE TABLE IF NOT EXISTS habit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            habit_id INTEGER NOT NULL,
+            logged_at TEXT NOT NULL,
+            FOREIGN KEY(habit_id) REFERENCES habits(id)
+        )
+    """)
+    _db.execute("CREATE INDEX IF NOT EXISTS idx_logs_habit_date ON habit_logs(habit_id, logged_at)")
 
 
 def add_habit(name: str) -> str:
@@ -35,38 +26,60 @@ def add_habit(name: str) -> str:
     if not name:
         return "Please provide a habit name."
     try:
-        with _conn() as conn:
-            conn.execute("INSERT OR IGNORE INTO habits(name) VALUES (?)", (name,))
-            conn.commit()
+        _db.execute("INSERT OR IGNORE INTO habits(name) VALUES (?)", (name,))
         return f"Habit added: {name}"
     except Exception as e:
         return f"Failed to add habit: {e}"
 
 
+def _insert_logs(names: list[str]) -> list[str]:
+    """Log every known habit in `names` in one transaction. Returns the unknown names."""
+    placeholders = ", ".join("?" for _ in names)
+    now = datetime.utcnow().isoformat()
+    with _db.LOCK:
+        conn = _db.get_conn()
+        ids = dict(conn.execute(f"SELECT name, id FROM habits WHERE name IN ({placeholders})", names).fetchall())
+        rows = [(ids[n], now) for n in names if n in ids]
+        if rows:
+            conn.execute("BEGIN")
+            with conn:
+                conn.executemany("INSERT INTO habit_logs(habit_id, logged_at) VALUES (?, ?)", rows)
+    return [n for n in names if n not in ids]
+
+
 def log_habit(name: str) -> str:
     name = name.strip()
     if not name:
         return "Please provide a habit name."
     try:
-        with _conn() as conn:
-            cur = conn.execute("SELECT id FROM habits WHERE name = ?", (name,))
-            row = cur.fetchone()
-            if not row:
-                return "Habit not found. Use /habit_add <name> first."
-            habit_id = row[0]
-            now = datetime.utcnow().isoformat()
-            conn.execute("INSERT INTO habit_logs(habit_id, logged_at) VALUES (?, ?)", (habit_id, now))
-            conn.commit()
+        if _insert_logs([name]):
+            return "Habit not found. Use /habit_add <name> first."
         return f"Logged habit: {name}"
     except Exception as e:
         return f"Failed to log habit: {e}"
 
 
+def log_habits(names: list[str]) -> str:
+    """Log several habits at once with a single lookup and a single batched insert."""
+    names = [n.strip() for n in names if n.strip()]
+    if not names:
+        return "Please provide a habit name."
+    try:
+        missing = _insert_logs(names)
+        logged = [n for n in names if n not in missing]
+        lines = []
+        if logged:
+            lines.append(f"Logged habits: {', '.join(logged)}")
+        if missing:
+            lines.append(f"Habits not found: {', '.join(missing)}. Use /habit_add <name> first.")
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Failed to log habits: {e}"
+
+
 def list_habits() -> str:
     try:
-        with _conn() as conn:
-            cur = conn.execute("SELECT h.name, COUNT(l.id) FROM habits h LEFT JOIN habit_logs l ON l.habit_id = h.id GROUP BY h.id ORDER BY h.name")
-            rows = cur.fetchall()
+        rows = _db.execute("SELECT h.name, COUNT(l.id) FROM habits h LEFT JOIN habit_logs l ON l.habit_id = h.id GROUP BY h.id ORDER BY h.name")
         if not rows:
             return "No habits yet. Add one with /habit_add <name>."
         lines = ["Your habits:"]
@@ -79,22 +92,35 @@ def list_habits() -> str:
 
 def current_streak(name: str) -> str:
     try:
-        with _conn() as conn:
-            cur = conn.execute("SELECT id FROM habits WHERE name = ?", (name,))
-            row = cur.fetchone()
+        with _db.LOCK:
+            conn = _db.get_conn()
+            row = conn.execute("SELECT id FROM habits WHERE name = ?", (name,)).fetchone()
             if not row:
                 return "Habit not found."
             habit_id = row[0]
-            cur = conn.execute("SELECT date(logged_at) FROM habit_logs WHERE habit_id = ? ORDER BY logged_at DESC", (habit_id,))
-            dates = [datetime.fromisoformat(d + "T00:00:00").date() for (d,) in cur.fetchall()]
-        if not dates:
-            return "No logs yet."
-        streak = 0
-        today = datetime.utcnow().date()
-        day = today
-        while day in dates:
-            streak += 1
-            day = day - timedelta(days=1)
+            if not conn.execute("SELECT 1 FROM habit_logs WHERE habit_id = ? LIMIT 1", (habit_id,)).fetchone():
+                return "No logs yet."
+            today = datetime.utcnow().date()
+            # Only read logs inside a recent window (an index range on
+            # logged_at); if the streak runs to the window's edge, double it
+            window = 30
+            while True:
+                since = today - timedelta(days=window - 1)
+                cur = conn.execute(
+                    "SELECT DISTINCT date(logged_at) AS d FROM habit_logs "
+                    "WHERE habit_id = ? AND logged_at >= ? ORDER BY d DESC",
+                    (habit_id, since.isoformat())
+                )
+                streak = 0
+                day = today
+                logged = cur.fetchone()
+                while logged and date.fromisoformat(logged[0]) == day:
+                    streak += 1
+                    day = day - timedelta(days=1)
+                    logged = cur.fetchone()
+                if streak < window:
+                    break
+                window *= 2
         return f"Current streak for {name}: {streak} day(s)."
     except Exception as e:
         return f"Failed to compute streak: {e}"
@@ -103,8 +129,7 @@ def current_streak(name: str) -> str:
 def logs_today() -> int:
     """Count total habit logs made today (UTC)."""
     try:
-        with _conn() as conn:
-            cur = conn.execute("SELECT COUNT(*) FROM habit_logs WHERE date(logged_at) = date('now')")
-            return int(cur.fetchone()[0] or 0)
+        rows = _db.execute("SELECT COUNT(*) FROM habit_logs WHERE date(logged_at) = date('now')")
+        return int(rows[0][0] or 0)
     except Exception:
         return 0
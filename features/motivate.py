@@ -3,6 +3,7 @@ Motivational nudges system for Kairos productivity chatbot.
 Provides encouragement, productivity tips, and motivational quotes.
 """
 
+import html
 import random
 
 # Curated motivational quotes focused on growth, career, and overcoming adversity
@@ -144,6 +145,16 @@ def get_nudge_message(include_tip=False):
     return f"✨ {quote}"
 
 
+# Invariant HTML frame for email footers; only the quote changes per email
+_FOOTER_TEMPLATE = """
+    <div style="margin-top: 30px; padding: 20px; background-color: #f0f7ff; border-left: 4px solid #4A90E2; border-radius: 4px;">
+        <p style="margin: 0; font-style: italic; color: #555;">
+            "{quote}"
+        </p>
+    </div>
+    """
+
+
 def get_email_footer_nudge():
     """
     Get a motivational message suitable for email footers.
@@ -152,14 +163,4 @@ def get_email_footer_nudge():
     Returns:
         str: HTML formatted motivational message
     """
-    quote = get_random_quote()
-    
-    html = f"""
-    <div style="margin-top: 30px; padding: 20px; background-color: #f0f7ff; border-left: 4px solid #4A90E2; border-radius: 4px;">
-        <p style="margin: 0; font-style: italic; color: #555;">
-            "{quote}"
-        </p>
-    </div>
-    """
-    
-    return html
+    return _FOOTER_TEMPLATE.format(quote=html.escape(get_random_quote()))
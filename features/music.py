@@ -28,14 +28,20 @@ FOCUS_SONGS = {
     }
 }
 
+_SONG_VALUES = tuple(FOCUS_SONGS.values())
+
+
+# FOCUS_SONGS is static, so the menu is built once at import
+_MUSIC_MENU = (
+    "🎵 **Focus Music** - Pick a vibe:\n\n"
+    + "".join(f"{key}. {song['name']}\n   ⏱ {song['duration']}\n\n" for key, song in FOCUS_SONGS.items())
+    + "Reply with a number (1-5) to play!"
+)
+
 
 def get_music_menu() -> str:
     """Returns formatted menu of focus music options"""
-    menu = "🎵 **Focus Music** - Pick a vibe:\n\n"
-    for key, song in FOCUS_SONGS.items():
-        menu += f"{key}. {song['name']}\n   ⏱ {song['duration']}\n\n"
-    menu += "Reply with a number (1-5) to play!"
-    return menu
+    return _MUSIC_MENU
 
 
 def get_song_by_choice(choice: str) -> dict | None:
@@ -45,4 +51,4 @@ def get_song_by_choice(choice: str) -> dict | None:
 
 def get_random_song() -> dict:
     """Returns a random song dict"""
-    return random.choice(list(FOCUS_SONGS.values()))
+    return _SONG_VALUES[random.randrange(len(_SONG_VALUES))]
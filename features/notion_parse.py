@@ -0,0 +1,53 @@
+"""
+Extract the task fields every feature needs from raw Notion rows.
+Each row is parsed once and the result is kept on the row itself,
+so cached rows are not re-walked by the next caller.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass(slots=True)
+class TaskRow:
+    id: str | None
+    name: str
+    status: str
+    priority: str
+    due_start: str | None  # raw Notion "start", date or full timestamp
+    due_date: date | None  # calendar day of due_start
+
+
+def parse_ymd(s: str) -> date:
+    """Parse a YYYY-MM-DD prefix without going through strptime."""
+    return date(int(s[0:4]), int(s[5:7]), int(s[8:10]))
+
+
+def _parse_row(row: dict) -> TaskRow:
+    props = row.get("properties", {})
+    title_arr = props.get("Task", {}).get("title") or []
+    name = title_arr[0].get("plain_text", "Untitled") if title_arr else "Untitled"
+    status = (props.get("Status", {}).get("status") or {}).get("name", "Unknown")
+    priority = (props.get("Priority", {}).get("select") or {}).get("name", "Low")
+    due_obj = props.get("Due date", {}).get("date")
+    due_start = due_obj.get("start") if isinstance(due_obj, dict) else None
+    due_date = None
+    if due_start:
+        try:
+            due_date = parse_ymd(due_start)
+        except ValueError:
+            due_date = None
+    return TaskRow(row.get("id"), name, status, priority, due_start, due_date)
+
+
+def parse_task(row: dict) -> TaskRow:
+    """Return the TaskRow for a raw Notion row, parsing it on first use."""
+    task = row.get("_parsed")
+    if task is None:
+        task = row["_parsed"] = _parse_row(row)
+    return task
+
+
+def parse_tasks(rows: list) -> list[TaskRow]:
+    """parse_task over a list of raw Notion rows."""
+    return [parse_task(row) for row in rows]
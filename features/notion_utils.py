@@ -1,5 +1,10 @@
-import os, requests
+import os, json, requests, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from features.notion_parse import parse_task
 
 load_dotenv()
 NOTION_TOKEN = os.getenv("NOTION_TOKEN")
@@ -11,21 +16,147 @@ HEADERS = {
     "Notion-Version": "2022-06-28",
 }
 
-def get_tasks_raw(limit: int = 50):
+# (connect, read) timeouts for every Notion call
+REQUEST_TIMEOUT = (3.05, 10)
+
+# One keep-alive session for all Notion calls so TLS is negotiated once,
+# with retries on rate limits and transient server errors.
+_SESSION = requests.Session()
+_SESSION.headers.update(HEADERS)
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST", "PATCH"]),
+        # Hand the last response back so callers' status_code checks still run
+        raise_on_status=False,
+        # These calls can run on the bot's event loop; never sleep for an
+        # arbitrary server-chosen Retry-After, only our short backoff
+        respect_retry_after_header=False,
+    ),
+))
+
+# Largest page the Notion query endpoint returns
+MAX_PAGE_SIZE = 100
+
+CACHE_TTL_SECONDS = 30
+# Short-lived cache of query results:
+# (DATABASE_ID, limit, filter) -> (expires_at, results, title_index or None)
+_tasks_cache = {}
+_tasks_cache_lock = threading.Lock()
+# Per-key locks so concurrent cache misses trigger a single query
+_fetch_locks = {}
+# Bumped by clear_tasks_cache() so a query that started before a write
+# can't store its (now stale) result afterwards
+_cache_generation = 0
+
+
+def clear_tasks_cache():
+    """Drop cached query results so the next read hits Notion again."""
+    global _cache_generation
+    with _tasks_cache_lock:
+        _tasks_cache.clear()
+        _cache_generation += 1
+
+
+def _cache_key(limit: int, filter_: dict | None) -> tuple:
+    return (DATABASE_ID, limit, json.dumps(filter_, sort_keys=True) if filter_ else None)
+
+
+def _query_tasks(limit: int | None, filter_: dict | None) -> list | None:
+    """
+    Run a database query, following start_cursor pages until `limit` rows
+    (or every row, if limit is None). None on an API error.
+    """
     url = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
     body = {
-        "page_size": limit,
         "sorts": [{"property": "Due date", "direction": "ascending"}],  # <-- exact property
     }
-    r = requests.post(url, headers=HEADERS, json=body)
-    if r.status_code != 200:
-        print("❌ Notion API Error:", r.text)
-        return []
-    return r.json().get("results", [])
-
-# if you use list_tasks() wrapper:
-from features.view import format_tasks_list
+    if filter_:
+        body["filter"] = filter_
+
+    results = []
+    while True:
+        wanted = MAX_PAGE_SIZE if limit is None else limit - len(results)
+        body["page_size"] = min(wanted, MAX_PAGE_SIZE)
+        r = _SESSION.post(url, json=body, timeout=REQUEST_TIMEOUT)
+        if r.status_code != 200:
+            print("❌ Notion API Error:", r.text)
+            return None
+        data = r.json()
+        results.extend(data.get("results", []))
+        if not data.get("has_more") or (limit is not None and len(results) >= limit):
+            return results
+        body["start_cursor"] = data.get("next_cursor")
+
+
+def _store_results(key: tuple, results: list, generation: int):
+    """Cache results, unless the cache was cleared since the query began."""
+    now = time.monotonic()
+    with _tasks_cache_lock:
+        if generation != _cache_generation:
+            return
+        # Keys embed dates (e.g. the reminder filter), so drop expired entries
+        # rather than letting one accumulate per day
+        for stale in [k for k, entry in _tasks_cache.items() if entry[0] <= now]:
+            del _tasks_cache[stale]
+        _tasks_cache[key] = (now + CACHE_TTL_SECONDS, results, None)
+
+
+def _cached_results(key: tuple) -> list | None:
+    with _tasks_cache_lock:
+        cached = _tasks_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+    return None
+
+
+def get_tasks_raw(limit: int | None = 50, use_cache: bool = True, filter_: dict | None = None):
+    """
+    Query the task database sorted by due date.
+    limit=None fetches every matching row.
+    filter_ is passed through as the Notion query "filter" object.
+    """
+    key = _cache_key(limit, filter_)
+    if not use_cache:
+        generation = _cache_generation
+        results = _query_tasks(limit, filter_)
+        if results is None:
+            return []
+        _store_results(key, results, generation)
+        return list(results)
+
+    results = _cached_results(key)
+    if results is not None:
+        return list(results)
+
+    # One Notion query per key at a time: callers that miss together
+    # (e.g. reminders firing at once) wait and share its result.
+    with _tasks_cache_lock:
+        fetch_lock = _fetch_locks.setdefault(key, threading.Lock())
+    try:
+        with fetch_lock:
+            results = _cached_results(key)
+            if results is not None:
+                return list(results)
+            generation = _cache_generation
+            results = _query_tasks(limit, filter_)
+            if results is None:
+                return []
+            _store_results(key, results, generation)
+        return list(results)
+    finally:
+        # Waiters already hold a reference; later callers find the cached entry
+        with _tasks_cache_lock:
+            if _fetch_locks.get(key) is fetch_lock:
+                del _fetch_locks[key]
+
+
 def list_tasks():
+    from features.view import format_tasks_list
     return format_tasks_list(get_tasks_raw()) or "📭 No tasks available."
 
 
@@ -35,20 +166,55 @@ def _get_page_id(task_row: dict) -> str | None:
     return task_row.get("id")
 
 
+def _patch_page(page_id: str, payload: dict, success_message: str, error_prefix: str) -> dict:
+    """PATCH a Notion page and return the usual {success, message} result."""
+    if not page_id:
+        return {"success": False, "message": "Missing page_id"}
+
+    url = f"https://api.notion.com/v1/pages/{page_id}"
+    r = _SESSION.patch(url, json=payload, timeout=REQUEST_TIMEOUT)
+    if r.status_code == 200:
+        clear_tasks_cache()
+        return {"success": True, "message": success_message}
+    return {
+        "success": False,
+        "message": f"{error_prefix}: {r.status_code} {r.text[:150]}"
+    }
+
+
+def _build_title_index(rows: list) -> dict[str, dict]:
+    """Map lowercase task title -> row (first match wins)."""
+    index = {}
+    for row in rows:
+        title = parse_task(row).name.strip()
+        if title:
+            index.setdefault(title.lower(), row)
+    return index
+
+
+def _get_title_index(limit: int = 50) -> dict[str, dict]:
+    """Title index for the (cached) unfiltered query, built once per cache entry."""
+    rows = get_tasks_raw(limit=limit)
+    key = _cache_key(limit, None)
+    with _tasks_cache_lock:
+        entry = _tasks_cache.get(key)
+    if not entry:
+        return _build_title_index(rows)
+    if entry[2] is None:
+        index = _build_title_index(entry[1])
+        with _tasks_cache_lock:
+            if _tasks_cache.get(key) is entry:
+                _tasks_cache[key] = (entry[0], entry[1], index)
+        return index
+    return entry[2]
+
+
 def find_task_by_name(name: str, limit: int = 50) -> dict | None:
     """
     Find a task by its title (exact match, case-insensitive) in the Notion database.
     Returns the first match or None.
     """
-    results = get_tasks_raw(limit=limit)
-    target = name.strip().lower()
-    for row in results:
-        props = row.get("properties", {})
-        title_arr = props.get("Task", {}).get("title") or []
-        title = title_arr[0].get("plain_text") if title_arr else None
-        if title and title.strip().lower() == target:
-            return row
-    return None
+    return _get_title_index(limit).get(name.strip().lower())
 
 
 def update_task_status(page_id: str, status_name: str) -> dict:
@@ -57,22 +223,16 @@ def update_task_status(page_id: str, status_name: str) -> dict:
     status_name should match one of the database's status options (e.g.,
     "Not started", "In progress", "Completed").
     """
-    if not page_id:
-        return {"success": False, "message": "Missing page_id"}
-
-    url = f"https://api.notion.com/v1/pages/{page_id}"
     payload = {
         "properties": {
             "Status": {"status": {"name": status_name}}
         }
     }
-    r = requests.patch(url, headers=HEADERS, json=payload)
-    if r.status_code == 200:
-        return {"success": True, "message": f"Status updated to '{status_name}'."}
-    return {
-        "success": False,
-        "message": f"Failed to update status: {r.status_code} {r.text[:150]}"
-    }
+    return _patch_page(
+        page_id, payload,
+        f"Status updated to '{status_name}'.",
+        "Failed to update status",
+    )
 
 
 def set_task_status_by_name(task_name: str, status_name: str) -> dict:
@@ -84,22 +244,42 @@ def set_task_status_by_name(task_name: str, status_name: str) -> dict:
     return update_task_status(page_id, status_name)
 
 
+def set_many_statuses(names_to_status: dict, limit: int = 50) -> dict:
+    """
+    Update the status of several tasks by name with a single database query.
+    The PATCH requests run in parallel over the shared session.
+    Returns {task_name: result} with the same result dicts as update_task_status.
+    """
+    index = _get_title_index(limit)
+    results = {}
+    pending = {}
+    for name, status_name in names_to_status.items():
+        row = index.get(name.strip().lower())
+        if not row:
+            results[name] = {"success": False, "message": f"Task not found: {name}"}
+            continue
+        pending[name] = (_get_page_id(row), status_name)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = {
+                name: pool.submit(update_task_status, page_id, status_name)
+                for name, (page_id, status_name) in pending.items()
+            }
+            for name, future in futures.items():
+                results[name] = future.result()
+    return {name: results[name] for name in names_to_status}
+
+
 def archive_task(page_id: str) -> dict:
     """
     Archive (soft delete) a Notion task page by setting archived=true.
     """
-    if not page_id:
-        return {"success": False, "message": "Missing page_id"}
-
-    url = f"https://api.notion.com/v1/pages/{page_id}"
-    payload = {"archived": True}
-    r = requests.patch(url, headers=HEADERS, json=payload)
-    if r.status_code == 200:
-        return {"success": True, "message": "Task archived successfully."}
-    return {
-        "success": False,
-        "message": f"Failed to archive task: {r.status_code} {r.text[:150]}"
-    }
+    return _patch_page(
+        page_id, {"archived": True},
+        "Task archived successfully.",
+        "Failed to archive task",
+    )
 
 
 def delete_task_by_name(task_name: str) -> dict:
@@ -113,22 +293,16 @@ def delete_task_by_name(task_name: str) -> dict:
 
 def update_due_date(page_id: str, due_date: str) -> dict:
     """Update the Due date property of a Notion task page."""
-    if not page_id:
-        return {"success": False, "message": "Missing page_id"}
-    
-    url = f"https://api.notion.com/v1/pages/{page_id}"
     payload = {
         "properties": {
             "Due date": {"date": {"start": due_date}}
         }
     }
-    r = requests.patch(url, headers=HEADERS, json=payload)
-    if r.status_code == 200:
-        return {"success": True, "message": f"Due date updated to {due_date}."}
-    return {
-        "success": False,
-        "message": f"Failed to update due date: {r.status_code} {r.text[:150]}"
-    }
+    return _patch_page(
+        page_id, payload,
+        f"Due date updated to {due_date}.",
+        "Failed to update due date",
+    )
 
 
 def update_due_date_by_name(task_name: str, due_date: str) -> dict:
@@ -139,31 +313,3 @@ def update_due_date_by_name(task_name: str, due_date: str) -> dict:
     page_id = _get_page_id(row)
     return update_due_date(page_id, due_date)
 
-
-def update_due_date(page_id: str, due_date: str) -> dict:
-    """Update the Due date property of a Notion task page."""
-    if not page_id:
-        return {"success": False, "message": "Missing page_id"}
-    
-    url = f"https://api.notion.com/v1/pages/{page_id}"
-    payload = {
-        "properties": {
-            "Due date": {"date": {"start": due_date}}
-        }
-    }
-    r = requests.patch(url, headers=HEADERS, json=payload)
-    if r.status_code == 200:
-        return {"success": True, "message": f"Due date updated to {due_date}."}
-    return {
-        "success": False,
-        "message": f"Failed to update due date: {r.status_code} {r.text[:150]}"
-    }
-
-
-def update_due_date_by_name(task_name: str, due_date: str) -> dict:
-    """Convenience helper to find a task by name and update its due date."""
-    row = find_task_by_name(task_name)
-    if not row:
-        return {"success": False, "message": f"Task not found: {task_name}"}
-    page_id = _get_page_id(row)
-    return update_due_date(page_id, due_date)
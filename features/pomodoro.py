@@ -3,29 +3,47 @@ Pomodoro Timer using Telegram Bot's Job Queue
 Non-blocking implementation with status tracking
 """
 
-from datetime import datetime, timedelta
+import time
+from dataclasses import dataclass
+from typing import Optional
 from telegram import Update
 from telegram.ext import ContextTypes
+from features.analytics import log_session_start, log_session_end
+
+
+@dataclass(slots=True)
+class Timer:
+    """Metadata for a running work or break session, stored as job.data"""
+    kind: str      # "work" or "break"
+    task: Optional[str]
+    chat_id: int
 
-# Store active timers per user
-active_timers = {}
 
 WORK_MINUTES = 25
 BREAK_MINUTES = 5
 
 
+def _active_job(context: ContextTypes.DEFAULT_TYPE, user_id: int):
+    """The user's pending Pomodoro job, if any. The JobQueue is the only record of running timers."""
+    for kind in ("work", "break"):
+        jobs = context.job_queue.get_jobs_by_name(f"pomodoro_{kind}_{user_id}")
+        if jobs:
+            return jobs[0]
+    return None
+
+
+def _remaining_seconds(job) -> int:
+    return max(0, int(job.next_t.timestamp() - time.time()))
+
+
 async def pomodoro_work_complete(context: ContextTypes.DEFAULT_TYPE):
     """Callback when work session completes"""
     job = context.job
     user_id = job.user_id
     chat_id = job.chat_id
     
-    if user_id in active_timers:
-        del active_timers[user_id]
-    
     # Log end
     try:
-        from features.analytics import log_session_end
         log_session_end(user_id, "work")
     except Exception:
         pass
@@ -42,12 +60,8 @@ async def pomodoro_break_complete(context: ContextTypes.DEFAULT_TYPE):
     user_id = job.user_id
     chat_id = job.chat_id
     
-    if user_id in active_timers:
-        del active_timers[user_id]
-    
     # Log end
     try:
-        from features.analytics import log_session_end
         log_session_end(user_id, "break")
     except Exception:
         pass
@@ -63,11 +77,10 @@ async def start_pomodoro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
     
-    if user_id in active_timers:
-        remaining = active_timers[user_id]['end_time'] - datetime.now()
-        minutes = int(remaining.total_seconds() // 60)
-        seconds = int(remaining.total_seconds() % 60)
-        timer_type = active_timers[user_id]['type']
+    job = _active_job(context, user_id)
+    if job:
+        minutes, seconds = divmod(_remaining_seconds(job), 60)
+        timer_type = job.data.kind
         
         await update.message.reply_text(
             f"You already have an active {timer_type} timer.\n"
@@ -78,17 +91,10 @@ async def start_pomodoro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     task = " ".join(context.args) if context.args else None
     
-    end_time = datetime.now() + timedelta(minutes=WORK_MINUTES)
-    active_timers[user_id] = {
-        'end_time': end_time,
-        'type': 'work',
-        'task': task,
-        'chat_id': chat_id
-    }
-    
     context.job_queue.run_once(
         pomodoro_work_complete,
         WORK_MINUTES * 60,
+        data=Timer('work', task, chat_id),
         chat_id=chat_id,
         user_id=user_id,
         name=f"pomodoro_work_{user_id}"
@@ -97,8 +103,6 @@ async def start_pomodoro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     task_msg = f"\nTask: {task}" if task else ""
     # Log start
     try:
-        from features.analytics import init_db, log_session_start
-        init_db()
         log_session_start(user_id, "work", task)
     except Exception:
         pass
@@ -115,10 +119,9 @@ async def start_break(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
     chat_id = update.effective_chat.id
     
-    if user_id in active_timers:
-        remaining = active_timers[user_id]['end_time'] - datetime.now()
-        minutes = int(remaining.total_seconds() // 60)
-        seconds = int(remaining.total_seconds() % 60)
+    job = _active_job(context, user_id)
+    if job:
+        minutes, seconds = divmod(_remaining_seconds(job), 60)
         
         await update.message.reply_text(
             f"You already have an active timer.\n"
@@ -126,17 +129,10 @@ async def start_break(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    end_time = datetime.now() + timedelta(minutes=BREAK_MINUTES)
-    active_timers[user_id] = {
-        'end_time': end_time,
-        'type': 'break',
-        'task': None,
-        'chat_id': chat_id
-    }
-    
     context.job_queue.run_once(
         pomodoro_break_complete,
         BREAK_MINUTES * 60,
+        data=Timer('break', None, chat_id),
         chat_id=chat_id,
         user_id=user_id,
         name=f"pomodoro_break_{user_id}"
@@ -144,8 +140,6 @@ async def start_break(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Log start
     try:
-        from features.analytics import init_db, log_session_start
-        init_db()
         log_session_start(user_id, "break", None)
     except Exception:
         pass
@@ -159,24 +153,24 @@ async def pomodoro_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Check current Pomodoro status"""
     user_id = update.effective_user.id
     
-    if user_id not in active_timers:
+    job = _active_job(context, user_id)
+    if not job:
         await update.message.reply_text(
             "No active Pomodoro session. Use /pomodoro to start a 25-minute focus session."
         )
         return
     
-    timer = active_timers[user_id]
-    remaining = timer['end_time'] - datetime.now()
+    timer = job.data
+    remaining = _remaining_seconds(job)
     
-    if remaining.total_seconds() <= 0:
+    if remaining <= 0:
         await update.message.reply_text("Time's up.")
         return
     
-    minutes = int(remaining.total_seconds() // 60)
-    seconds = int(remaining.total_seconds() % 60)
+    minutes, seconds = divmod(remaining, 60)
     
-    if timer['type'] == 'work':
-        task_msg = f"\nWorking on: {timer['task']}" if timer['task'] else ""
+    if timer.kind == 'work':
+        task_msg = f"\nWorking on: {timer.task}" if timer.task else ""
         icon = ""
         status = "Focus time"
     else:
@@ -194,24 +188,15 @@ async def stop_pomodoro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Stop/cancel current Pomodoro"""
     user_id = update.effective_user.id
     
-    if user_id not in active_timers:
+    job = _active_job(context, user_id)
+    if not job:
         await update.message.reply_text("No active Pomodoro session to stop.")
         return
     
-    # Get all jobs for this user (both work and break)
-    work_jobs = context.job_queue.get_jobs_by_name(f"pomodoro_work_{user_id}")
-    break_jobs = context.job_queue.get_jobs_by_name(f"pomodoro_break_{user_id}")
-    all_jobs = list(work_jobs) + list(break_jobs)
-    
-    for job in all_jobs:
-        job.schedule_removal()
-    
-    del active_timers[user_id]
+    kind = job.data.kind
+    job.schedule_removal()
     
-    # Log end of whichever was active
     try:
-        from features.analytics import log_session_end
-        kind = timer_type = 'work' if any(context.job_queue.get_jobs_by_name(f"pomodoro_work_{user_id}")) else 'break'
         log_session_end(user_id, kind)
     except Exception:
         pass
@@ -3,21 +3,28 @@ Q&A module for Kairos productivity chatbot.
 Handles productivity-related questions using Gemini AI.
 """
 
-import os
-import google.generativeai as genai
-from dotenv import load_dotenv
+import asyncio
+import re
 
-load_dotenv()
+from features._genai import get_llm
+from features.notion_parse import parse_tasks
 
-# Configure Gemini
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GOOGLE_API_KEY)
+# Upper bound on a single Gemini round-trip
+QA_TIMEOUT_SECONDS = 30
 
-MODEL = "gemini-2.5-flash"
-llm = genai.GenerativeModel(MODEL)
+# Static part of the Q&A prompt; only the workload context and question vary
+PROMPT_HEADER = """
+You are Kairos — a productivity assistant for university students balancing courses, jobs, internships, and deadlines.
+
+Format your response exactly like this:
+1. One empathetic sentence acknowledging their situation
+2. One practical tip (1-2 sentences, actionable and specific)
+
+Tone: Supportive friend who gets it. No corporate jargon, no emojis, no asterisks or bold text.
+Be realistic and direct. Never invent details they didn't mention. Try keeping your answers concise and casual, simple English. """
 
 
-def get_qa_response(question: str, task_summary: str = None) -> str:
+async def get_qa_response(question: str, task_summary: str = None) -> str:
     """
     Get AI response to productivity questions.
     
@@ -34,27 +41,44 @@ def get_qa_response(question: str, task_summary: str = None) -> str:
     if task_summary:
         context = f"\n\nUser's current workload summary:\n{task_summary}"
     
-    prompt = f"""
-You are Kairos — a productivity assistant for university students balancing courses, jobs, internships, and deadlines.
-
-Format your response exactly like this:
-1. One empathetic sentence acknowledging their situation
-2. One practical tip (1-2 sentences, actionable and specific)
-
-Tone: Supportive friend who gets it. No corporate jargon, no emojis, no asterisks or bold text.
-Be realistic and direct. Never invent details they didn't mention. Try keeping your answers concise and casual, simple English. {context}
-
-User question:
-{question}
-"""
+    prompt = PROMPT_HEADER + context + "\n\nUser question:\n" + question + "\n"
+    
+    llm = get_llm()
+    if not llm:
+        return "Q&A isn't available right now. Please set GOOGLE_API_KEY in .env"
     
     try:
-        response = llm.generate_content(prompt)
+        response = await asyncio.wait_for(llm.generate_content_async(prompt), QA_TIMEOUT_SECONDS)
         return response.text.strip()
     except Exception as e:
         return f"I'm having trouble processing that question right now. Error: {str(e)}\n\nTry rephrasing your question or ask something else!"
 
 
+# EXPLICIT help request phrases - user must clearly ask for help/tips/advice
+EXPLICIT_HELP_PHRASES = [
+    "i need help",
+    "i need tips",
+    "i need advice",
+    "give me tips",
+    "give me advice",
+    "help me",
+    "any tips",
+    "any advice",
+    "can you help",
+    "how do i",
+    "how can i",
+    "how should i",
+    "what should i do",
+    "tips for",
+    "advice on",
+    "advice for"
+]
+
+# Compiled once so each message is scanned in a single pass
+EXPLICIT_HELP_RE = re.compile(r"\b(?:" + "|".join(map(re.escape, EXPLICIT_HELP_PHRASES)) + r")\b")
+HELP_WORD_RE = re.compile("help|tips|advice")
+
+
 def is_productivity_question(text: str) -> bool:
     """
     Check if text is EXPLICITLY asking for productivity help/tips/advice.
@@ -66,38 +90,19 @@ def is_productivity_question(text: str) -> bool:
     Returns:
         bool: True if it's clearly asking for productivity advice
     """
-    text_lower = text.lower()
+    # Cheapest checks first so ordinary chat exits before any regex runs.
+    # Must be substantial (at least 4 words)
+    if len(text.split()) < 4:
+        return False
     
-    # EXPLICIT help request phrases - user must clearly ask for help/tips/advice
-    explicit_help_phrases = [
-        "i need help",
-        "i need tips",
-        "i need advice",
-        "give me tips",
-        "give me advice",
-        "help me",
-        "any tips",
-        "any advice",
-        "can you help",
-        "how do i",
-        "how can i",
-        "how should i",
-        "what should i do",
-        "tips for",
-        "advice on",
-        "advice for"
-    ]
-    
-    # Must contain one of these explicit phrases
-    is_explicit_help = any(phrase in text_lower for phrase in explicit_help_phrases)
+    text_lower = text.lower()
     
     # Must also be a question (ends with ?) OR contains help/tips/advice
-    is_question_format = text.endswith("?") or any(word in text_lower for word in ["help", "tips", "advice"])
-    
-    # Must be substantial (at least 4 words)
-    is_substantial = len(text.split()) >= 4
+    if not (text.endswith("?") or HELP_WORD_RE.search(text_lower)):
+        return False
     
-    return is_explicit_help and is_question_format and is_substantial
+    # Must contain one of the explicit help phrases
+    return bool(EXPLICIT_HELP_RE.search(text_lower))
 
 
 def get_brief_task_summary(tasks_list: list, max_tasks: int = 5) -> str:
@@ -115,20 +120,8 @@ def get_brief_task_summary(tasks_list: list, max_tasks: int = 5) -> str:
         return "No current tasks"
     
     summary_lines = []
-    for i, task in enumerate(tasks_list[:max_tasks]):
-        try:
-            props = task.get("properties", {})
-            name = (
-                props.get("Task", {}).get("title", [{}])[0].get("plain_text", "Untitled")
-                if props.get("Task", {}).get("title")
-                else "Untitled"
-            )
-            priority = props.get("Priority", {}).get("select", {}).get("name", "Medium")
-            status = props.get("Status", {}).get("status", {}).get("name", "Not started")
-            
-            summary_lines.append(f"- {name} [{priority}] - {status}")
-        except:
-            continue
+    for task in parse_tasks(tasks_list[:max_tasks]):
+        summary_lines.append(f"- {task.name} [{task.priority}] - {task.status}")
     
     if len(tasks_list) > max_tasks:
         summary_lines.append(f"...and {len(tasks_list) - max_tasks} more tasks")
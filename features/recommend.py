@@ -1,35 +1,23 @@
-from datetime import datetime
+import heapq
+from datetime import date
+
+from features.notion_parse import parse_task
 
 # Simple priority weights
 PRIORITY_WEIGHT = {"High": 3, "Medium": 2, "Low": 1}
 
 
-def _extract_task_fields(row: dict):
-    props = row.get("properties", {})
-    title_arr = props.get("Task", {}).get("title") or []
-    name = title_arr[0].get("plain_text") if title_arr else "Untitled"
-    status = props.get("Status", {}).get("status", {}).get("name", "Unknown")
-    priority = props.get("Priority", {}).get("select", {}).get("name", "Low")
-    due_obj = props.get("Due date", {}).get("date")
-    due_start = due_obj.get("start") if isinstance(due_obj, dict) else None
-    due_date = None
-    if due_start:
-        try:
-            due_date = datetime.strptime(due_start[:10], "%Y-%m-%d")
-        except Exception:
-            due_date = None
-    return name, status, priority, due_date
-
-
 def recommend(results: list, limit: int = 3) -> list:
     """Score tasks by priority and due date urgency."""
     scored = []
-    now = datetime.now()
+    today = date.today().toordinal()
     
     for row in results:
-        name, status, priority, due_date = _extract_task_fields(row)
-        if status == "Completed":
+        task = parse_task(row)
+        if task.status == "Completed":
             continue
+        priority = task.priority
+        due_date = task.due_date
         
         # Priority scoring: High=50, Medium=30, Low=10
         priority_score = PRIORITY_WEIGHT.get(priority, 1) * 15
@@ -37,7 +25,8 @@ def recommend(results: list, limit: int = 3) -> list:
         # Urgency scoring based on due date
         urgency_score = 0
         if due_date:
-            delta_days = (due_date - now).days
+            # Whole calendar days until due: 0 = today, -1 = yesterday
+            delta_days = due_date.toordinal() - today
             
             if delta_days < 0:
                 # Overdue: boost based on priority
@@ -69,10 +58,10 @@ def recommend(results: list, limit: int = 3) -> list:
         
         # Final score: priority + urgency
         score = priority_score + urgency_score
-        scored.append((score, name, row))
+        scored.append((score, row))
     
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [row for _, __, row in scored[:limit]]
+    # Top-k selection: O(n log k) instead of sorting every task
+    return [row for _, row in heapq.nlargest(limit, scored, key=lambda x: x[0])]
 
 
 def format_recommendations(rows: list) -> str:
@@ -80,7 +69,7 @@ def format_recommendations(rows: list) -> str:
         return "No recommendations right now."
     lines = ["Try these next:"]
     for i, row in enumerate(rows, 1):
-        name, status, priority, due_date = _extract_task_fields(row)
-        due_str = due_date.strftime('%b %d, %Y') if due_date else 'No date'
-        lines.append(f"{i}. {name} — {priority} priority — Due: {due_str}")
+        task = parse_task(row)
+        due_str = task.due_date.strftime('%b %d, %Y') if task.due_date else 'No date'
+        lines.append(f"{i}. {task.name} — {task.priority} priority — Due: {due_str}")
     return "\n".join(lines)
@@ -3,20 +3,115 @@ SendGrid email reminder system (alternative to Gmail SMTP).
 Works even when SMTP ports are blocked by firewalls.
 """
 
+import asyncio
+import logging
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import date, datetime, timedelta
+from html import escape
 from dotenv import load_dotenv
 
 from features.notion_utils import get_tasks_raw
+from features.notion_parse import parse_tasks
 
 load_dotenv()
 
+log = logging.getLogger(__name__)
+
 SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 SENDER_EMAIL = os.getenv("SENDER_EMAIL")  # Must be verified in SendGrid
 RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 
+# SendGrid accepts at most this many personalizations per request
+MAX_PERSONALIZATIONS = 1000
+
+# SendGrid client shared by every send, created on first use
+_sendgrid_client = None
+_sendgrid_lock = threading.Lock()
+
+
+def _get_sendgrid_client():
+    """Return the process-wide SendGrid client, creating it once."""
+    global _sendgrid_client
+    with _sendgrid_lock:
+        if _sendgrid_client is None:
+            from sendgrid import SendGridAPIClient
+            _sendgrid_client = SendGridAPIClient(SENDGRID_API_KEY)
+        return _sendgrid_client
+
+
+# Static parts of the reminder email, built once at import instead of per send.
+_EMAIL_HEAD = """
+    <html>
+        <head>
+            <style>
+                body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+                .header { background-color: #4A90E2; color: white; padding: 20px; text-align: center; }
+                .content { padding: 20px; }
+                .task { 
+                    background-color: #f9f9f9; 
+                    border-left: 4px solid #4A90E2; 
+                    padding: 15px; 
+                    margin: 10px 0; 
+                    border-radius: 4px;
+                }
+                .task-name { font-weight: bold; font-size: 16px; }
+                .task-details { color: #666; margin-top: 5px; }
+                .high-priority { border-left-color: #E74C3C; }
+                .medium-priority { border-left-color: #F39C12; }
+                .low-priority { border-left-color: #3498DB; }
+                .motivation { 
+                    margin-top: 30px; 
+                    padding: 20px; 
+                    background-color: #f0f7ff; 
+                    border-left: 4px solid #4A90E2; 
+                    border-radius: 4px;
+                }
+                .quote { 
+                    font-style: italic; 
+                    color: #555; 
+                    margin: 0;
+                    font-size: 15px;
+                }
+            </style>
+        </head>
+        <body>
+            <div class="header">
+                <h1>⏰ Kairos Task Reminder</h1>
+            </div>
+            <div class="content">
+"""
+
+_EMAIL_INTRO = """
+                <p>You have <strong>{count}</strong> task{plural} due in the next 24 hours:</p>
+    """
+
+_TASK_BLOCK = """
+                <div class="task {priority_class}">
+                    <div class="task-name">{emoji} {name}</div>
+                    <div class="task-details">
+                        📅 Due: {due}<br>
+                        📊 Status: {status}<br>
+                        ⚡ Priority: {priority}
+                    </div>
+                </div>
+        """
 
-def send_email_sendgrid(subject: str, body: str, recipient: str = None):
+_EMAIL_FOOTER = """
+                <div class="motivation">
+                    <p class="quote">✨ {quote}</p>
+                </div>
+                <p style="margin-top: 20px;">Stay focused! 💪</p>
+            </div>
+        </body>
+    </html>
+    """
+
+_PRIORITY_EMOJI = {"High": "🔴", "Medium": "🟡", "Low": "🔵"}
+
+
+async def send_email_sendgrid(subject: str, body: str, recipient: str = None):
     """
     Send email using SendGrid API (no SMTP ports needed).
     
@@ -32,7 +127,6 @@ def send_email_sendgrid(subject: str, body: str, recipient: str = None):
     Install: pip install sendgrid
     """
     try:
-        from sendgrid import SendGridAPIClient
         from sendgrid.helpers.mail import Mail, Email, To, Content
     except ImportError:
         return {
@@ -67,8 +161,9 @@ def send_email_sendgrid(subject: str, body: str, recipient: str = None):
             html_content=body
         )
         
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
+        sg = _get_sendgrid_client()
+        # sg.send is a blocking HTTPS POST; keep it off the event loop
+        response = await asyncio.to_thread(sg.send, message)
         
         return {
             "success": True,
@@ -82,51 +177,143 @@ def send_email_sendgrid(subject: str, body: str, recipient: str = None):
         }
 
 
-def get_upcoming_tasks(hours_ahead: int = 24):
-    """Get tasks due today or tomorrow (within next 24 hours)."""
-    all_tasks = get_tasks_raw()
-    upcoming = []
+async def send_bulk(items: list[tuple[str, str, str]]) -> list[dict]:
+    """
+    Send several emails over the shared SendGrid client.
+    Items with the same body go out as one API request with a
+    personalization (recipient + subject) per item.
     
-    today = datetime.now().date()
-    tomorrow = today + timedelta(days=1)
+    Args:
+        items: List of (subject, html_body, recipient) tuples
     
-    for task in all_tasks:
-        try:
-            props = task.get("properties", {})
-            
-            name = (
-                props.get("Task", {}).get("title", [{}])[0].get("plain_text", "Untitled")
-                if props.get("Task", {}).get("title")
-                else "Untitled"
-            )
+    Returns:
+        list[dict]: One result dict per item, in order
+    """
+    try:
+        from sendgrid.helpers.mail import Mail, Personalization, To
+    except ImportError:
+        return [{
+            "success": False,
+            "message": "SendGrid not installed. Run: pip install sendgrid"
+        } for _ in items]
+    
+    if not SENDGRID_API_KEY or not SENDER_EMAIL:
+        return [{
+            "success": False,
+            "message": "SENDGRID_API_KEY and SENDER_EMAIL must be configured in .env"
+        } for _ in items]
+    
+    # Group item indexes by body so each group can share one request
+    groups = {}
+    for i, (_, body, _) in enumerate(items):
+        groups.setdefault(body, []).append(i)
+    
+    sg = _get_sendgrid_client()
+    results = [None] * len(items)
+    for body, indexes in groups.items():
+        for start in range(0, len(indexes), MAX_PERSONALIZATIONS):
+            batch = indexes[start:start + MAX_PERSONALIZATIONS]
+            mail = Mail(from_email=SENDER_EMAIL, html_content=body)
+            for i in batch:
+                subject, _, recipient = items[i]
+                personalization = Personalization()
+                personalization.add_to(To(recipient))
+                personalization.subject = subject
+                mail.add_personalization(personalization)
             
-            status = props.get("Status", {}).get("status", {}).get("name", "Unknown")
-            if status == "Completed":
+            try:
+                await asyncio.to_thread(sg.send, mail)
+                for i in batch:
+                    results[i] = {
+                        "success": True,
+                        "message": f"Email sent successfully to {items[i][2]} via SendGrid"
+                    }
+            except Exception as e:
+                for i in batch:
+                    results[i] = {
+                        "success": False,
+                        "message": f"SendGrid error for {items[i][2]}: {str(e)}"
+                    }
+    return results
+
+
+def get_upcoming_tasks(hours_ahead: int = 24) -> list[dict]:
+    """
+    Get tasks due from the start of today through the end of the day that
+    is `hours_ahead` hours from now, so the default window covers everything
+    due today or tomorrow, including timed tasks late tomorrow. Each task
+    carries its deadline as epoch seconds in "due_ts".
+    """
+    today = date.today()
+    now_ts = int(time.time())
+    start_ts = int(datetime.combine(today, datetime.min.time()).timestamp())
+    cutoff_day = date.fromtimestamp(now_ts + hours_ahead * 3600)
+    # Last second of cutoff_day
+    cutoff_ts = int(datetime.combine(cutoff_day + timedelta(days=1), datetime.min.time()).timestamp()) - 1
+    cutoff_str = cutoff_day.isoformat()
+    today_str = today.isoformat()
+    # A timed value's written date can sit a day off the local calendar
+    # (e.g. "...T03:00:00Z" for 20:00 the evening before in UTC-7), so the
+    # prefix gate for those is one day wider on each side
+    lo_str = (today - timedelta(days=1)).isoformat()
+    hi_str = (cutoff_day + timedelta(days=1)).isoformat()
+    
+    # Local-midnight epoch for each day in the window, so date-only due
+    # dates resolve with a dict lookup instead of a datetime parse
+    midnight_ts = {}
+    day = today
+    while day <= cutoff_day:
+        midnight_ts[day.isoformat()] = int(datetime.combine(day, datetime.min.time()).timestamp())
+        day += timedelta(days=1)
+    
+    # Let Notion drop completed and clearly out-of-range tasks. Notion compares
+    # timed values in its own zone, not ours, so the date range is padded a day
+    # on each side and the epoch check below stays the only exact cut.
+    all_tasks = get_tasks_raw(limit=None, filter_={"and": [
+        {"property": "Status", "status": {"does_not_equal": "Completed"}},
+        {"property": "Due date", "date": {"on_or_after": lo_str}},
+        {"property": "Due date", "date": {"before": (cutoff_day + timedelta(days=2)).isoformat()}},
+    ]})
+    upcoming = []
+    
+    for task in parse_tasks(all_tasks):
+        due_start = task.due_start
+        if not due_start:
+            continue
+        
+        # ISO dates sort as strings, so out-of-window tasks are skipped
+        # on the 10-char prefix before any datetime parsing. Date-only values
+        # are decided here; timed ones only loosely, the epoch check is exact.
+        date_part = due_start[:10]
+        if len(due_start) == 10:
+            if date_part < today_str or date_part > cutoff_str:
                 continue
-            
-            priority = props.get("Priority", {}).get("select", {}).get("name", "Low")
-            
-            due_obj = props.get("Due date", {}).get("date")
-            due_start = due_obj.get("start") if isinstance(due_obj, dict) else None
-            
-            if due_start:
-                date_part = due_start[:10]
-                due_date = datetime.strptime(date_part, "%Y-%m-%d").date()
-                
-                # Include tasks due today or tomorrow
-                if due_date == today or due_date == tomorrow:
-                    upcoming.append({
-                        "name": name,
-                        "due_date": datetime.combine(due_date, datetime.min.time()),
-                        "priority": priority,
-                        "status": status
-                    })
+        elif date_part < lo_str or date_part > hi_str:
+            continue
         
-        except Exception as e:
-            print(f"⚠️ Error processing task: {e}")
+        if task.status == "Completed":
             continue
+        
+        try:
+            if len(due_start) > 10:
+                # Full timestamp, possibly with an offset or a trailing Z
+                due_ts = int(datetime.fromisoformat(due_start.replace("Z", "+00:00")).timestamp())
+            else:
+                due_ts = midnight_ts[date_part]
+        except (KeyError, ValueError, TypeError):
+            log.debug("Skipping task %r with bad due date %r", task.name, due_start, exc_info=True)
+            continue
+        
+        if start_ts <= due_ts <= cutoff_ts:
+            upcoming.append({
+                "name": task.name,
+                "due_ts": due_ts,
+                "priority": task.priority,
+                "status": task.status
+            })
     
-    upcoming.sort(key=lambda x: x["due_date"])
+    # The window is unbounded in size, so a full sort beats a bounded heap here
+    upcoming.sort(key=lambda x: x["due_ts"])
     return upcoming
 
 
@@ -142,88 +329,37 @@ def format_reminder_email(tasks: list):
     except:
         motivational_quote = "Stay focused! 💪"
     
-    priority_emoji = {"High": "🔴", "Medium": "🟡", "Low": "🔵"}
-    
     if len(tasks) == 1:
         subject = f"⏰ Reminder: {tasks[0]['name']} is due soon"
     else:
         subject = f"⏰ Reminder: {len(tasks)} tasks due soon"
     
-    html_body = f"""
-    <html>
-        <head>
-            <style>
-                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                .header {{ background-color: #4A90E2; color: white; padding: 20px; text-align: center; }}
-                .content {{ padding: 20px; }}
-                .task {{ 
-                    background-color: #f9f9f9; 
-                    border-left: 4px solid #4A90E2; 
-                    padding: 15px; 
-                    margin: 10px 0; 
-                    border-radius: 4px;
-                }}
-                .task-name {{ font-weight: bold; font-size: 16px; }}
-                .task-details {{ color: #666; margin-top: 5px; }}
-                .high-priority {{ border-left-color: #E74C3C; }}
-                .medium-priority {{ border-left-color: #F39C12; }}
-                .low-priority {{ border-left-color: #3498DB; }}
-                .motivation {{ 
-                    margin-top: 30px; 
-                    padding: 20px; 
-                    background-color: #f0f7ff; 
-                    border-left: 4px solid #4A90E2; 
-                    border-radius: 4px;
-                }}
-                .quote {{ 
-                    font-style: italic; 
-                    color: #555; 
-                    margin: 0;
-                    font-size: 15px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>⏰ Kairos Task Reminder</h1>
-            </div>
-            <div class="content">
-                <p>You have <strong>{len(tasks)}</strong> task{"s" if len(tasks) > 1 else ""} due in the next 24 hours:</p>
-    """
+    parts = [_EMAIL_HEAD, _EMAIL_INTRO.format(count=len(tasks), plural="s" if len(tasks) > 1 else "")]
     
     for task in tasks:
-        priority_class = f"{task['priority'].lower()}-priority"
-        emoji = priority_emoji.get(task['priority'], '🔵')
-        due_str = task['due_date'].strftime('%b %d, %Y')
-        
-        html_body += f"""
-                <div class="task {priority_class}">
-                    <div class="task-name">{emoji} {task['name']}</div>
-                    <div class="task-details">
-                        📅 Due: {due_str}<br>
-                        📊 Status: {task['status']}<br>
-                        ⚡ Priority: {task['priority']}
-                    </div>
-                </div>
-        """
+        priority = task['priority']
+        parts.append(_TASK_BLOCK.format(
+            priority_class=f"{priority.lower()}-priority",
+            emoji=_PRIORITY_EMOJI.get(priority, '🔵'),
+            name=escape(task['name']),
+            due=datetime.fromtimestamp(task['due_ts']).strftime('%b %d, %Y'),
+            status=escape(task['status']),
+            priority=escape(priority),
+        ))
     
-    html_body += f"""
-                <div class="motivation">
-                    <p class="quote">✨ {motivational_quote}</p>
-                </div>
-                <p style="margin-top: 20px;">Stay focused! 💪</p>
-            </div>
-        </body>
-    </html>
-    """
+    parts.append(_EMAIL_FOOTER.format(quote=escape(motivational_quote)))
     
+    html_body = "".join(parts)
     return subject, html_body
 
 
-def check_and_send_reminders(hours_ahead: int = 24):
-    """Check for upcoming tasks and send email via SendGrid."""
+async def check_and_send_reminders(hours_ahead: int = 24):
+    """
+    Check for upcoming tasks and send email via SendGrid.
+    All due tasks go out as a single digest email per run, never one email per task.
+    """
     try:
-        upcoming_tasks = get_upcoming_tasks(hours_ahead)
+        upcoming_tasks = await asyncio.to_thread(get_upcoming_tasks, hours_ahead)
         
         if not upcoming_tasks:
             return {
@@ -233,7 +369,7 @@ def check_and_send_reminders(hours_ahead: int = 24):
             }
         
         subject, body = format_reminder_email(upcoming_tasks)
-        result = send_email_sendgrid(subject, body)
+        result = await send_email_sendgrid(subject, body)
         
         if result["success"]:
             return {
@@ -254,3 +390,9 @@ def check_and_send_reminders(hours_ahead: int = 24):
             "message": f"Error: {str(e)}",
             "tasks_count": 0
         }
+
+
+# Async entry point for the bot: the Notion query is blocking, so it runs
+# in a worker thread instead of stalling the event loop.
+async def aget_upcoming_tasks(hours_ahead: int = 24):
+    return await asyncio.to_thread(get_upcoming_tasks, hours_ahead)
@@ -1,33 +1,36 @@
 from __future__ import annotations
 from typing import List, Dict
-import os
 import json
 import re
 
-try:
-    import google.generativeai as genai
-    from dotenv import load_dotenv
-    load_dotenv()
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    if GOOGLE_API_KEY:
-        genai.configure(api_key=GOOGLE_API_KEY)
-        llm = genai.GenerativeModel("gemini-2.5-flash")
-    else:
-        llm = None
-except Exception:
-    llm = None
+from features._genai import get_llm
+
+# Outermost [...] in a Gemini reply, which may wrap the JSON in prose or fences
+_JSON_ARRAY_RE = re.compile(r'\[[\s\S]*\]')
+# Trailing comma before a closing bracket/brace, which json.loads rejects
+_TRAILING_COMMA_RE = re.compile(r',\s*([\]}])')
+
+
+def _loads_tolerant(text: str) -> list:
+    """json.loads, retried once without trailing commas; [] if both fail."""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA_RE.sub(r'\1', text))
+    except json.JSONDecodeError:
+        return []
 
 
 def tasks_from_image_bytes(file_bytes: bytes, mime_type: str = "image/jpeg") -> List[Dict]:
     """Parse schedule from image screenshot using Gemini vision. Optimized for tables with dates."""
     
+    llm = get_llm()
     if not llm:
         raise RuntimeError("Gemini API not configured. Please set GOOGLE_API_KEY in .env")
     
     try:
-        # Upload image to Gemini
-        import google.generativeai as genai
-        
         # Create a temporary file-like object
         image_part = {
             "mime_type": mime_type,
@@ -64,11 +67,11 @@ If you cannot read the image clearly or find any tasks, return: []
         raw = response.text.strip()
         
         # Extract JSON array
-        match = re.search(r'\[[\s\S]*\]', raw)
+        match = _JSON_ARRAY_RE.search(raw)
         if not match:
             return []
         
-        tasks = json.loads(match.group(0))
+        tasks = _loads_tolerant(match.group(0))
         return tasks
         
     except Exception as e:
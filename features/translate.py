@@ -1,20 +1,9 @@
-import os
 import json
+from functools import lru_cache
 from typing import Optional
 from io import BytesIO
 
-try:
-    import google.generativeai as genai
-    from dotenv import load_dotenv
-    load_dotenv()
-    GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-    if GOOGLE_API_KEY:
-        genai.configure(api_key=GOOGLE_API_KEY)
-        llm = genai.GenerativeModel("gemini-2.5-flash")
-    else:
-        llm = None
-except Exception:
-    llm = None
+from features._genai import get_llm
 
 try:
     from gtts import gTTS
@@ -44,6 +33,16 @@ SUPPORTED_LANGUAGES = {
     "hi": "Hindi"
 }
 
+# Unicode blocks that identify a target language by script alone
+_SCRIPT_RANGES = {
+    "zh": ((0x4E00, 0x9FFF),),                   # CJK ideographs
+    "ja": ((0x3040, 0x30FF),),                   # Hiragana + Katakana
+    "ko": ((0xAC00, 0xD7AF), (0x1100, 0x11FF)),  # Hangul
+    "ru": ((0x0400, 0x04FF),),                   # Cyrillic
+    "ar": ((0x0600, 0x06FF),),                   # Arabic
+    "hi": ((0x0900, 0x097F),),                   # Devanagari
+}
+
 # Map language codes to TTS language codes
 TTS_LANGUAGE_MAP = {
     "en": "en",
@@ -85,45 +84,118 @@ def get_language(user_id: int) -> str:
     return user_languages.get(user_id, "en")
 
 
-def translate_text(text: str, target_language: str) -> str:
-    """Translate text to target language using Gemini AI"""
-    
-    # Skip translation for English
-    if target_language == "en":
-        return text
-    
-    if not llm:
-        return text  # Return original if translation unavailable
-    
-    lang_name = SUPPORTED_LANGUAGES.get(target_language, target_language)
-    
-    try:
-        prompt = f"""
-Translate the following text to {lang_name} ({target_language}).
-
-IMPORTANT RULES:
+TRANSLATION_RULES = """IMPORTANT RULES:
 - Preserve ALL emojis, symbols, and special characters exactly as they are
 - Preserve ALL URLs, links, and dates
 - Preserve formatting (bullets, newlines, etc.)
 - Keep technical terms like "Pomodoro", "Notion", proper names
 - Keep command names like /tasks, /add, /pomodoro unchanged
 - Translate only the natural language parts
+"""
+
 
+def _in_ranges(cp: int, ranges: tuple) -> bool:
+    return any(lo <= cp <= hi for lo, hi in ranges)
+
+
+def _is_in_language(text: str, language_code: str) -> bool:
+    """Script-based check that text is already written in language_code.
+    Only targets with their own script are detected; Latin-script targets
+    (es, fr, de, ...) always go to Gemini."""
+    ranges = _SCRIPT_RANGES.get(language_code)
+    if not ranges:
+        return False
+    letters = [ord(ch) for ch in text if ch.isalpha()]
+    if not letters:
+        return False
+    # Japanese mixes kanji in, so any kana means it isn't Chinese
+    if language_code == "zh" and any(_in_ranges(cp, _SCRIPT_RANGES["ja"]) for cp in letters):
+        return False
+    # Most letters must be in the target's script
+    hits = sum(1 for cp in letters if _in_ranges(cp, ranges))
+    return hits * 2 > len(letters)
+
+
+@lru_cache(maxsize=4096)
+def _translate_cached(text: str, target_language: str) -> str:
+    """Gemini translation, memoized; raises on failure so errors aren't cached"""
+    # Already in the target language: no Gemini call, and the detection
+    # result is memoized with everything else so repeats skip it too
+    if _is_in_language(text, target_language):
+        return text
+    
+    lang_name = SUPPORTED_LANGUAGES.get(target_language, target_language)
+    
+    prompt = f"""
+Translate the following text to {lang_name} ({target_language}).
+
+{TRANSLATION_RULES}
 Text to translate:
 {text}
 
 Output ONLY the translated text, nothing else.
 """
-        
-        response = llm.generate_content(prompt)
-        translated = response.text.strip()
-        return translated
+    
+    response = get_llm().generate_content(prompt)
+    return response.text.strip()
+
+
+def translate_text(text: str, target_language: str) -> str:
+    """Translate text to target language using Gemini AI"""
+    
+    # Skip translation for English
+    if target_language == "en":
+        return text
+    
+    if not get_llm():
+        return text  # Return original if translation unavailable
+    
+    try:
+        return _translate_cached(text.strip(), target_language)
         
     except Exception as e:
         print(f"Translation error: {e}")
         return text  # Return original on error
 
 
+translate_text.cache_clear = _translate_cached.cache_clear
+
+
+def translate_many(texts: list[str], target_language: str) -> list[str]:
+    """
+    Translate several strings with one Gemini call.
+    Falls back to translate_text per string if the reply isn't a
+    JSON array of the same length.
+    """
+    if target_language == "en" or not get_llm() or not texts:
+        return list(texts)
+    if len(texts) == 1:
+        return [translate_text(texts[0], target_language)]
+    
+    lang_name = SUPPORTED_LANGUAGES.get(target_language, target_language)
+    prompt = f"""
+Translate each string in the JSON array below to {lang_name} ({target_language}).
+
+{TRANSLATION_RULES}
+Strings to translate:
+{json.dumps(texts, ensure_ascii=False)}
+
+Output ONLY a JSON array of the translations, in the same order, nothing else.
+"""
+    
+    try:
+        response = get_llm().generate_content(prompt)
+        raw = response.text.strip()
+        translated = json.loads(raw[raw.find("["):raw.rfind("]") + 1])
+        if (isinstance(translated, list) and len(translated) == len(texts)
+                and all(isinstance(t, str) for t in translated)):
+            return translated
+    except Exception as e:
+        print(f"Batch translation error: {e}")
+    
+    return [translate_text(text, target_language) for text in texts]
+
+
 def enable_tts(user_id: int) -> dict:
     """Enable text-to-speech for user"""
     if not TTS_AVAILABLE:
@@ -152,6 +224,15 @@ def is_tts_enabled(user_id: int) -> bool:
     return user_tts_enabled.get(user_id, False)
 
 
+@lru_cache(maxsize=256)
+def _synthesize(text: str, tts_lang: str) -> bytes:
+    """MP3 bytes for text, cached so repeated phrases skip the gTTS request"""
+    tts = gTTS(text=text, lang=tts_lang, slow=False)
+    audio_buffer = BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
 def text_to_speech(text: str, language_code: str = "en") -> BytesIO:
     """Convert text to speech audio file"""
     if not TTS_AVAILABLE:
@@ -160,19 +241,11 @@ def text_to_speech(text: str, language_code: str = "en") -> BytesIO:
     # Get TTS language code
     tts_lang = TTS_LANGUAGE_MAP.get(language_code, "en")
     
-    # Generate speech
-    tts = gTTS(text=text, lang=tts_lang, slow=False)
-    
-    # Save to BytesIO
-    audio_buffer = BytesIO()
-    tts.write_to_fp(audio_buffer)
-    audio_buffer.seek(0)
-    
-    return audio_buffer
+    # Fresh buffer per call; the cached bytes are shared
+    return BytesIO(_synthesize(text, tts_lang))
 
 
-def get_language_menu() -> str:
-    """Returns formatted menu of supported languages"""
+def _build_language_menu() -> str:
     menu = "🌍 **Language & Audio Settings**\n\nSupported languages:\n\n"
     for code, name in SUPPORTED_LANGUAGES.items():
         menu += f"• {code} - {name}\n"
@@ -181,3 +254,12 @@ def get_language_menu() -> str:
     menu += "• /tts_on — Enable audio responses 🔊 (motivational quotes only)\n"
     menu += "• /tts_off — Disable audio responses 🔇"
     return menu
+
+
+# SUPPORTED_LANGUAGES is static, so the menu only needs to be built once
+_LANGUAGE_MENU = _build_language_menu()
+
+
+def get_language_menu() -> str:
+    """Returns formatted menu of supported languages"""
+    return _LANGUAGE_MENU
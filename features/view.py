@@ -1,6 +1,18 @@
 from datetime import datetime, timedelta
 
-def filter_tasks_by_date(results, date_filter=None):
+from features.notion_parse import parse_task, parse_tasks
+
+# Same abbreviations as strftime('%b') in the C locale
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun",
+           "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+# Priority indicators: 🔴 High, 🟡 Medium, 🔵 Low
+PRIORITY_PREFIX = {"High": "🔴", "Medium": "🟡", "Low": "🔵"}
+
+FILTER_NAMES = {'today': 'today', 'tomorrow': 'tomorrow', 'week': 'this week'}
+
+
+def filter_tasks_by_date(results: list[dict], date_filter: str | None = None) -> list[dict]:
     """
     Filter tasks by date range.
     date_filter can be: 'today', 'tomorrow', 'week', or None (no filter)
@@ -10,85 +22,52 @@ def filter_tasks_by_date(results, date_filter=None):
     
     today = datetime.now().date()
     
+    # Every filter is a contiguous run of days, so match on [lo, hi]
     if date_filter == 'today':
-        target_date = today
-        match_dates = [target_date]
+        lo = hi = today
     elif date_filter == 'tomorrow':
-        target_date = today + timedelta(days=1)
-        match_dates = [target_date]
+        lo = hi = today + timedelta(days=1)
     elif date_filter == 'week':
         # Next 7 days
-        match_dates = [today + timedelta(days=i) for i in range(8)]
+        lo, hi = today, today + timedelta(days=7)
     else:
         return results
     
     filtered = []
     for row in results:
-        try:
-            props = row.get("properties", {})
-            due_obj = props.get("Due date", {}).get("date")
-            due_start = due_obj.get("start") if isinstance(due_obj, dict) else None
-            
-            if due_start:
-                date_part = due_start[:10]
-                task_date = datetime.strptime(date_part, "%Y-%m-%d").date()
-                if task_date in match_dates:
-                    filtered.append(row)
-        except Exception:
-            continue
+        task_date = parse_task(row).due_date
+        if task_date and lo <= task_date <= hi:
+            filtered.append(row)
     
     return filtered
 
 
-def format_tasks_list(results, date_filter=None, show_all=False):
+def format_tasks_list(results: list[dict], date_filter: str | None = None, show_all: bool = False) -> str:
     # Apply date filter if specified
     if date_filter:
         results = filter_tasks_by_date(results, date_filter)
     
     if not results:
         if date_filter:
-            filter_names = {'today': 'today', 'tomorrow': 'tomorrow', 'week': 'this week'}
-            return f"No tasks found for {filter_names.get(date_filter, 'the specified period')}."
+            return f"No tasks found for {FILTER_NAMES.get(date_filter, 'the specified period')}."
         return "No tasks found."
 
-    buckets = {"In progress": [], "Not started": [], "Completed": []}
-    # Priority indicators: 🔴 High, 🟡 Medium, 🔵 Low
-    priority_prefix = {"High": "🔴", "Medium": "🟡", "Low": "🔵"}
+    buckets: dict[str, list[str]] = {"In progress": [], "Not started": [], "Completed": []}
 
-    for row in results:
-        try:
-            props = row.get("properties", {})
-
-            name = (
-                props.get("Task", {}).get("title", [{}])[0].get("plain_text", "Untitled")
-                if props.get("Task", {}).get("title")
-                else "Untitled"
-            )
-            status = props.get("Status", {}).get("status", {}).get("name", "Unknown")
-            priority = props.get("Priority", {}).get("select", {}).get("name", "Low")
-            prefix = priority_prefix.get(priority, "🔵")
-
-            # ✅ exact key: "Due date" (case-sensitive)
-            due_obj = props.get("Due date", {}).get("date")
-            due_start = due_obj.get("start") if isinstance(due_obj, dict) else None
-
-            if due_start:
-                # handle date or datetime
-                date_part = due_start[:10]
-                try:
-                    dt = datetime.strptime(date_part, "%Y-%m-%d")
-                    date_str = f"Due: {dt.strftime('%b %d, %Y')}"
-                except Exception:
-                    date_str = f"Due: {due_start}"
-            else:
-                date_str = "No date"
-
-            line = f"{prefix} {name} — {date_str}"
-            (buckets[status] if status in buckets else buckets.setdefault("Other", [])).append(line)
-
-        except Exception as e:
-            print(f"⚠️ Skipped malformed task: {e}")
-            continue
+    for task in parse_tasks(results):
+        prefix = PRIORITY_PREFIX.get(task.priority, "🔵")
+
+        if task.due_date:
+            d = task.due_date
+            date_str = f"Due: {_MONTHS[d.month - 1]} {d.day:02d}, {d.year}"
+        elif task.due_start:
+            # Not a YYYY-MM-DD prefix; show it as Notion sent it
+            date_str = f"Due: {task.due_start}"
+        else:
+            date_str = "No date"
+
+        line = f"{prefix} {task.name} — {date_str}"
+        (buckets[task.status] if task.status in buckets else buckets.setdefault("Other", [])).append(line)
 
     # Build final output
     lines = []